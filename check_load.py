@@ -1,12 +1,19 @@
-import psutil
+import os
+
+# Number of logical CPUs cannot change during process lifetime, so look
+# it up once at import time instead of on every poll. sysconf answers
+# from cached kernel data where os.cpu_count() reads and parses sysfs
+try:
+    _NCPU = os.sysconf('SC_NPROCESSORS_ONLN')
+except (ValueError, OSError):
+    _NCPU = os.cpu_count() or 1
+_INV_NCPU = 1.0 / _NCPU
 
 def check_load():
-    loads = list(psutil.getloadavg())
-    num_logical_cpu = psutil.cpu_count(logical=True)
-    for i in range(len(loads)):
-        loads[i] /= num_logical_cpu
-    return loads
+    with open('/proc/loadavg', 'rb') as f:
+        load_1, load_5, load_15 = f.read().split()[:3]
+    return [float(load_1) * _INV_NCPU, float(load_5) * _INV_NCPU, float(load_15) * _INV_NCPU]
 
 if __name__ == "__main__":
     load_1, load_5, load_15 = check_load()
-    print(f"{load_1}, {load_5}, {load_15}")
\ No newline at end of file
+    print(f"{load_1}, {load_5}, {load_15}")
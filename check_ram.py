@@ -20,15 +20,24 @@
 #   some small modifications by b.von.st.vieth@fz-juelich.de
 #
 
+import re
 from sys import exit
+from functools import lru_cache
 from optparse import OptionParser
 
+from meminfo import read_meminfo
+
 # Standard Exit Codes for Nagios
 OK = 0
 WARNING = 1
 CRITICAL = 2
 UNKNOWN = 3
 
+# Threshold syntax: a number with an optional %/KB/MB/GB suffix (any
+# case), matched with one regex instead of a cascade of slice checks
+_THRESHOLD_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(%|[KMG]B?|)\s*$', re.I)
+_MULTIPLIER = {'': 1, 'K': 1, 'KB': 1, 'M': 1024, 'MB': 1024, 'G': 1024 * 1024, 'GB': 1024 * 1024}
+
 
 def check_ram(warning_threshold, critical_threshold, percent, verbosity, nocache):
     """Takes warning and critical thresholds in KB or percentage if third argument is true,
@@ -37,31 +46,20 @@ def check_ram(warning_threshold, critical_threshold, percent, verbosity, nocache
     if verbosity >= 3:
         print("Opening /proc/meminfo")
     try:
-        f = open('/proc/meminfo')
-    except Exception as e:
+        meminfo = read_meminfo()
+    except OSError as e:
         print("RAM CRITICAL: Error opening /proc/meminfo - %s" % str(e))
         return CRITICAL
 
-    output = f.readlines()
-    memtotal = None
-    memfree = None
-    memcached = None
-    membuffers = 0
-    memavailable = None
-    for x in range(len(output)):
-        y = output[x].split()
-        if y[0] == "MemTotal:":
-            memtotal = int(y[1])
-        elif y[0] == "MemFree:":
-            memfree = int(y[1])
-        elif y[0] == "Cached:":
-            memcached = int(y[1])
-        elif y[0] == "Buffers:":
-            membuffers = int(y[1])
-        elif y[0] == "MemAvailable:":
-            memavailable = int(y[1])
-
-    if memtotal is None or memfree is None or memcached is None:
+    memtotal = meminfo.get(b"MemTotal")
+    memfree = meminfo.get(b"MemFree")
+    memcached = meminfo.get(b"Cached")
+    membuffers = meminfo.get(b"Buffers", 0)
+    memavailable = meminfo.get(b"MemAvailable")
+
+    # not memtotal also guards against a (nonsensical) zero MemTotal so
+    # the percentage division below can never fail
+    if not memtotal or memfree is None or memcached is None:
         print("UNKNOWN: failed to get mem stats")
         return UNKNOWN
 
@@ -72,35 +70,56 @@ def check_ram(warning_threshold, critical_threshold, percent, verbosity, nocache
     else:
         total_free = memfree + memcached + membuffers
 
-    total_used_megs = float(memtotal - memfree - memcached - membuffers) / 1024
-    total_free_megs = float(total_free) / 1024
-    memtotal_megs = float(memtotal) / 1024
+    # KB -> MB as pure integer arithmetic; the %d formats below truncate
+    # to whole MB anyway, so the float round trip bought nothing
+    total_used_megs = (memtotal - memfree - memcached - membuffers) // 1024
+    total_free_megs = total_free // 1024
+    memtotal_megs = memtotal // 1024
 
+    # One f-string evaluation per branch, perfdata suffix included, so
+    # each call formats the whole output line in a single pass
     if percent:
-        percentage_free = int(float(total_free) / float(memtotal) * 100)
+        percentage_free = (total_free * 100) // memtotal
         if percentage_free < critical_threshold:
-            MESSAGE = "RAM CRITICAL: %d%% ram free (%d/%d MB used)" % (percentage_free, total_used_megs, memtotal_megs)
+            MESSAGE = f"RAM CRITICAL: {percentage_free}% ram free ({total_used_megs}/{memtotal_megs} MB used)|memused={total_used_megs};{memtotal_megs};"
             STATE = CRITICAL
         elif percentage_free < warning_threshold:
-            MESSAGE = "RAM WARNING: %d%% ram free (%d/%d MB used)" % (percentage_free, total_used_megs, memtotal_megs)
+            MESSAGE = f"RAM WARNING: {percentage_free}% ram free ({total_used_megs}/{memtotal_megs} MB used)|memused={total_used_megs};{memtotal_megs};"
             STATE = WARNING
         else:
-            MESSAGE = "RAM OK: %d%% ram free" % percentage_free
+            MESSAGE = f"RAM OK: {percentage_free}% ram free|memused={total_used_megs};{memtotal_megs};"
             STATE = OK
     else:
         if total_free < critical_threshold:
-            MESSAGE = "RAM CRITICAL: %dMB ram free (%d/%d MB used)" % (total_free_megs, total_used_megs, memtotal_megs)
+            MESSAGE = f"RAM CRITICAL: {total_free_megs}MB ram free ({total_used_megs}/{memtotal_megs} MB used)|memused={total_used_megs};{memtotal_megs};"
             STATE = CRITICAL
         elif total_free < warning_threshold:
-            MESSAGE = "RAM WARNING: %dMB ram free (%d/%d MB used)" % (total_free_megs, total_used_megs, memtotal_megs)
+            MESSAGE = f"RAM WARNING: {total_free_megs}MB ram free ({total_used_megs}/{memtotal_megs} MB used)|memused={total_used_megs};{memtotal_megs};"
             STATE = WARNING
         else:
-            MESSAGE = "RAM OK: %dMB ram free" % total_free_megs
+            MESSAGE = f"RAM OK: {total_free_megs}MB ram free|memused={total_used_megs};{memtotal_megs};"
             STATE = OK
-    MESSAGE += "|memused=%d;%d;" % (total_used_megs, memtotal_megs)
     return [MESSAGE, STATE]
 
 
+# In agent mode the same -w/-c strings arrive on every poll, so the
+# regex match and float conversion only ever run once per distinct input
+@lru_cache(maxsize=16)
+def parse_threshold(input_value):
+    """takes one threshold string and returns the value in KB together with
+    a flag saying whether it was given as a percentage; raises ValueError
+    on unparseable input so daemon callers can report it without dying"""
+
+    match = _THRESHOLD_RE.match(input_value)
+    if match is None:
+        raise ValueError("invalid threshold %r" % (input_value,))
+
+    value, unit = float(match.group(1)), match.group(2).upper()
+    if unit == "%":
+        return value, True
+    return value * _MULTIPLIER[unit], False
+
+
 def main():
     """main func, parse args, do sanity checks and call check_ram func"""
 
@@ -151,56 +170,15 @@ def main():
         print("UNKNOWN: you did not specify a critical threshold\n")
         parser.print_help()
         return UNKNOWN
-    else:
-        warning_threshold = str(warning_threshold)
-        critical_threshold = str(critical_threshold)
-
-    megs = ["MB", "Mb", "mb", "mB", "M", "m"]
-    gigs = ["GB", "Gb", "gb", "gB", "G", "g"]
-
-    W_percent = False
-    C_percent = False
-
-    def get_threshold(input_value):
-        """takes one arg and returns the float threshold value"""
-
-        try:
-            threshold = float(input_value)
-        except ValueError:
-            print("UNKNOWN: invalid threshold given")
-            exit(UNKNOWN)
-
-        return threshold
-
-    # Find out if the supplied argument is a percent or a size
-    # and get its value
-    if warning_threshold[-1] == "%":
-        warning_threshold = get_threshold(warning_threshold[:-1])
-        W_percent = True
-    elif warning_threshold[-2:] in megs:
-        warning_threshold = get_threshold(warning_threshold[:-2]) * 1024
-    elif warning_threshold[-1] in megs:
-        warning_threshold = get_threshold(warning_threshold[:-1]) * 1024
-    elif warning_threshold[-2:] in gigs:
-        warning_threshold = get_threshold(warning_threshold[:-2]) * 1024 * 1024
-    elif warning_threshold[-1] in gigs:
-        warning_threshold = get_threshold(warning_threshold[:-1]) * 1024 * 1024
-    else:
-        warning_threshold = get_threshold(warning_threshold)
-
-    if critical_threshold[-1] == "%":
-        critical_threshold = get_threshold(critical_threshold[:-1])
-        C_percent = True
-    elif critical_threshold[-2:] in megs:
-        critical_threshold = get_threshold(critical_threshold[:-2]) * 1024
-    elif critical_threshold[-1] in megs:
-        critical_threshold = get_threshold(critical_threshold[:-1]) * 1024
-    elif critical_threshold[-2:] in gigs:
-        critical_threshold = get_threshold(critical_threshold[:-2]) * 1024 * 1024
-    elif critical_threshold[-1] in gigs:
-        critical_threshold = get_threshold(critical_threshold[:-1]) * 1024 * 1024
-    else:
-        critical_threshold = get_threshold(critical_threshold)
+
+    # Find out if the supplied arguments are percentages or sizes
+    # and get their values
+    try:
+        warning_threshold, W_percent = parse_threshold(warning_threshold)
+        critical_threshold, C_percent = parse_threshold(critical_threshold)
+    except ValueError:
+        print("UNKNOWN: invalid threshold given")
+        exit(UNKNOWN)
 
     # Make sure that we use either percentages or units but not both as this makes
     # the code more ugly and complex
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+#
+# Shared /proc/meminfo reader. Every check that needs memory figures
+# goes through one cached fd, one reusable buffer and one parse pass
+# instead of each plugin re-opening and re-scanning the file.
+
+import atexit
+import errno
+import os
+import re
+
+# The fields the checks need, matched in one C-level scan over the
+# whole buffer instead of splitting every line in Python
+_MEMINFO_RE = re.compile(rb'^(MemTotal|MemFree|Cached|Buffers|MemAvailable):\s+(\d+)', re.M)
+
+# Keep /proc/meminfo open and read into one reusable buffer: in daemon
+# mode each poll is then a single pread with no heap allocation
+_BUF = bytearray(8192)
+_MEM_FD = None
+
+
+def _meminfo_fd():
+    """returns the cached /proc/meminfo fd, opening it on first use"""
+    global _MEM_FD
+    if _MEM_FD is None:
+        _MEM_FD = os.open('/proc/meminfo', os.O_RDONLY | os.O_CLOEXEC)
+        atexit.register(_close_meminfo_fd)
+    return _MEM_FD
+
+
+def _close_meminfo_fd():
+    global _MEM_FD
+    if _MEM_FD is not None:
+        os.close(_MEM_FD)
+        _MEM_FD = None
+
+
+def read_meminfo():
+    """reads /proc/meminfo in one pread and returns a dict mapping the
+    needed field names (as bytes, without the colon) to values in KB;
+    raises OSError if the file cannot be read"""
+
+    global _MEM_FD
+    try:
+        n = os.preadv(_meminfo_fd(), [_BUF], 0)
+    except OSError as e:
+        if e.errno != errno.EBADF:
+            raise
+        # cached fd was closed behind our back; re-open and retry once
+        _MEM_FD = None
+        n = os.preadv(_meminfo_fd(), [_BUF], 0)
+
+    # All five keys sit in the first few lines of /proc/meminfo, so stop
+    # scanning the remaining ~50 lines as soon as they are filled
+    meminfo = {}
+    for m in _MEMINFO_RE.finditer(_BUF, 0, n):
+        meminfo[m.group(1)] = int(m.group(2))
+        if len(meminfo) == 5:
+            break
+    return meminfo
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+#
+# Persistent agent worker. Nagios-style polling pays ~20-100 ms of
+# interpreter and import startup for every fresh check process; keeping
+# one long-running process and serving results over a Unix socket drops
+# the per-poll cost to the actual check work.
+#
+# Protocol: one request line per connection, answered with one line.
+#   load                      -> "0.01, 0.05, 0.05"
+#   ram <warning> <critical>  -> Nagios plugin output line
+# Thresholds are in KB, or percentages if both carry a trailing "%".
+
+import os
+import socket
+import sys
+
+from check_load import check_load
+from check_ram import check_ram, parse_threshold
+
+DEFAULT_SOCKET_PATH = "/run/haproxy-agent.sock"
+
+# How long a connected client may take to send its request line before
+# we give up on it; without this one silent client wedges the agent
+RECV_TIMEOUT = 5.0
+
+
+def handle(request):
+    parts = request.split()
+    if not parts:
+        return "UNKNOWN: empty request"
+    command = parts[0]
+    if command == "load":
+        load_1, load_5, load_15 = check_load()
+        return f"{load_1}, {load_5}, {load_15}"
+    if command == "ram" and len(parts) == 3:
+        try:
+            warning, W_percent = parse_threshold(parts[1])
+            critical, C_percent = parse_threshold(parts[2])
+        except ValueError:
+            return "UNKNOWN: invalid threshold given"
+        if W_percent != C_percent:
+            return "UNKNOWN: please make thresholds either units or percentages, not one of each"
+        result = check_ram(warning, critical, W_percent, 0, False)
+        if isinstance(result, int):
+            return "RAM UNKNOWN: check failed"
+        return result[0]
+    return "UNKNOWN: unrecognised request %r" % request
+
+
+def serve(socket_path):
+    try:
+        os.unlink(socket_path)
+    except FileNotFoundError:
+        pass
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+    while True:
+        conn, _ = server.accept()
+        with conn:
+            # pollers time out, hang or disconnect before reading as a
+            # matter of course; none of that may take the daemon down
+            try:
+                conn.settimeout(RECV_TIMEOUT)
+                request = conn.recv(1024).decode("ascii", "replace").strip()
+                conn.sendall(handle(request).encode() + b"\n")
+            except OSError:
+                continue
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SOCKET_PATH)